@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """Extract readable content from a web page URL.
 
-Strips scripts/styles/hidden elements and extracts article text
-using regex-based tag stripping + segment extraction.
+Strips scripts/styles/hidden elements and extracts article text.
+Uses selectolax (lexbor) for single-pass DOM parsing when installed,
+otherwise falls back to regex-based tag stripping + segment extraction.
 
 Usage: python3 extract_webpage.py <url> [--format text|md|json] [--max-chars N]
 
@@ -10,6 +11,7 @@ Output: Clean text content to stdout.
 """
 
 import argparse
+import http.client
 import json
 import re
 import ssl
@@ -17,140 +19,357 @@ import sys
 import urllib.request
 from html import unescape
 
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
 REQUEST_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en-US,en;q=0.9",
     "Cache-Control": "no-cache",
 }
-
-
-def _ssl_ctx():
-    ctx = ssl.create_default_context()
-    try:
-        import certifi
-        ctx.load_verify_locations(certifi.where())
-    except ImportError:
-        pass
-    return ctx
+READ_CHUNK_SIZE = 64 * 1024
+
+# Shared by all requests: building a context parses the whole CA bundle
+_SSL_CTX = ssl.create_default_context()
+try:
+    import certifi
+    _SSL_CTX.load_verify_locations(certifi.where())
+except ImportError:
+    pass
+
+NON_CONTENT_TAGS = (
+    "script", "style", "noscript", "template", "svg", "canvas",
+    "iframe", "object", "embed", "nav", "footer",
+)
+CONTENT_TAGS = (
+    "p", "h1", "h2", "h3", "h4", "h5", "h6",
+    "li", "blockquote", "pre", "td", "figcaption",
+)
+DESCRIPTION_ATTRS = ("og:description", "description", "twitter:description")
+
+# Candidates only: [aria-hidden] and [style] nodes are checked with
+# _is_hidden_attr, as CSS value matching is exact and case-sensitive
+_DOM_STRIP_SELECTOR = ", ".join(NON_CONTENT_TAGS + ("[hidden]", "[aria-hidden]", "[style]"))
+_DOM_CONTENT_SELECTOR = ", ".join(CONTENT_TAGS)
+# Cheap substring prefilter for CONTENT_TAGS (false positives are fine)
+_CONTENT_MARKERS = ("<p", "<h1", "<h2", "<h3", "<h4", "<h5", "<h6", "<li", "<bl", "<td", "<fi")
+# (minimum length, prefix) per content tag; other tags use the default
+_SEGMENT_FORMATS = {f"h{level}": (10, "#" * level + " ") for level in range(1, 7)}
+_SEGMENT_FORMATS["li"] = (20, "• ")
+_DEFAULT_SEGMENT_FORMAT = (30, "")
+
+_TAG_STRIP_RE = re.compile(r"<[^>]+>")
+_COMMENT_RE = re.compile(r"<!--[\s\S]*?-->")
+_META_KEYS = ("og:title",) + DESCRIPTION_ATTRS
+_META_KEYS_ALT = "|".join(re.escape(key) for key in _META_KEYS)
+# One sweep for <title> and the meta tags, with either attribute order:
+# groups are (title) | (attr, key, content) | (content, attr, key)
+_METADATA_RE = re.compile(
+    r"<title[^>]*>(.*?)</title>"
+    rf"""|<meta[^>]+(property|name)=["']({_META_KEYS_ALT})["'][^>]+content=["']([^"']+)["']"""
+    rf"""|<meta[^>]+content=["']([^"']+)["'][^>]+(property|name)=["']({_META_KEYS_ALT})["']""",
+    re.DOTALL | re.IGNORECASE,
+)
+_NON_CONTENT_ALT = "|".join(NON_CONTENT_TAGS)
+_STRIP_BLOCK_RE = re.compile(rf"<({_NON_CONTENT_ALT})\b[^>]*>[\s\S]*?</\1>", re.IGNORECASE)
+_STRIP_SELF_RE = re.compile(rf"<(?:{_NON_CONTENT_ALT})\b[^>]*/?>", re.IGNORECASE)
+VOID_TAGS = frozenset((
+    "area", "base", "br", "col", "embed", "hr", "img", "input",
+    "link", "meta", "param", "source", "track", "wbr",
+))
+
+# Opening tag whose attributes mention "hidden" or "none". The lookahead
+# first checks that the tag is terminated, so the lazy scan after it can't
+# fail at a missing ">" and backtrack (unterminated tags stay linear).
+_HIDDEN_CANDIDATE_RE = re.compile(
+    r"<([a-zA-Z][\w:-]*)(?![\w:-])(?=[^<>]*>)([^<>]*?(?:hidden|none)[^<>]*)>",
+    re.IGNORECASE,
+)
+# name[=value] pairs; quoted values are consumed whole so their words
+# are never read as attribute names
+_ATTR_RE = re.compile(r"""([^\s"'=<>/]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'<>]+)))?""")
+_DISPLAY_NONE_RE = re.compile(r"display\s*:\s*none")
+_TAG_BOUNDARY_RES: dict[str, re.Pattern] = {}
+_CONTENT_RE = re.compile(
+    r"<(p|h[1-6]|li|blockquote|pre|td|figcaption)\b[^>]*>([\s\S]*?)</\1>",
+    re.IGNORECASE,
+)
+_INVISIBLE_RE = re.compile(r"[\u200b-\u200f\u202a-\u202e\u2060-\u2069\ufeff]")
+# Tabs and runs of spaces; a lone space is already normalized
+_HSPACE_RE = re.compile(r"\t[\t ]*| [\t ]+")
+_NEWLINE_RE = re.compile(r"\s*\n\s*")
+
+
+def _read_body(resp) -> bytes | bytearray:
+    """Read a response body without buffering chunked bodies twice."""
+    if not isinstance(resp, http.client.HTTPResponse) or resp.length is not None:
+        # file:/data: URLs give plain file objects; with a Content-Length,
+        # read() fills one exactly-sized buffer
+        return resp.read()
+    # Chunked: append into one growing buffer instead of joining a chunk list
+    buf = bytearray()
+    while chunk := resp.read1(READ_CHUNK_SIZE):
+        buf += chunk
+    return buf
 
 
 def fetch_html(url: str, timeout: int = 10) -> tuple[str, str]:
     """Fetch HTML and return (html, final_url)."""
     req = urllib.request.Request(url, headers=REQUEST_HEADERS)
-    with urllib.request.urlopen(req, timeout=timeout, context=_ssl_ctx()) as resp:
+    with urllib.request.urlopen(req, timeout=timeout, context=_SSL_CTX) as resp:
         final_url = resp.url or url
         charset = resp.headers.get_content_charset() or "utf-8"
-        html = resp.read().decode(charset, errors="replace")
+        html = _read_body(resp).decode(charset, errors="replace")
     return html, final_url
 
 
-def extract_metadata(html: str) -> dict:
-    """Extract title and description from HTML."""
-    title = None
-    description = None
-
-    # Title from <title> tag
-    m = re.search(r"<title[^>]*>(.*?)</title>", html, re.DOTALL | re.IGNORECASE)
-    if m:
-        title = unescape(re.sub(r"<[^>]+>", "", m.group(1))).strip()
-
-    # og:title
-    m = re.search(r'<meta[^>]+property=["\']og:title["\'][^>]+content=["\']([^"\']+)["\']', html, re.IGNORECASE)
-    if not m:
-        m = re.search(r'<meta[^>]+content=["\']([^"\']+)["\'][^>]+property=["\']og:title["\']', html, re.IGNORECASE)
-    if m:
-        title = unescape(m.group(1)).strip()
-
-    # description
-    for attr in ("og:description", "description", "twitter:description"):
-        pat1 = rf'<meta[^>]+(?:property|name)=["\']{ re.escape(attr) }["\'][^>]+content=["\']([^"\']+)["\']'
-        pat2 = rf'<meta[^>]+content=["\']([^"\']+)["\'][^>]+(?:property|name)=["\']{ re.escape(attr) }["\']'
-        m = re.search(pat1, html, re.IGNORECASE) or re.search(pat2, html, re.IGNORECASE)
-        if m:
-            description = unescape(m.group(1)).strip()
-            break
+def parse_html(html: str):
+    """Parse HTML once with selectolax, or return None when it isn't installed."""
+    if LexborHTMLParser is None:
+        return None
+    return LexborHTMLParser(html)
+
+
+def _add_meta(found: dict, attr: str, key: str, order: int, value: str) -> bool:
+    """Record a meta value under (key, order); True once nothing later can win.
+
+    Order 0 (key before content) is preferred over order 1, and og:title
+    only counts as a property.
+    """
+    if key == "og:title" and attr != "property":
+        return False
+    found.setdefault((key, order), value)
+    return ("og:title", 0) in found and ("og:description", 0) in found
+
+
+def _resolve_metadata(found: dict, decode=lambda value: value) -> dict:
+    """Pick the title and description from values gathered by _add_meta."""
+    def meta(key: str) -> str | None:
+        return found.get((key, 0), found.get((key, 1)))
+
+    title = meta("og:title")
+    if title is None:
+        title = found.get("title")
+    if title is not None:
+        title = decode(title).strip()
+
+    description = next((meta(attr) for attr in DESCRIPTION_ATTRS if meta(attr) is not None), None)
+    if description is not None:
+        description = decode(description).strip()
 
     return {"title": title, "description": description}
 
 
-def strip_tags_and_content(html: str, tags: list[str]) -> str:
-    """Remove specified tags and their content entirely."""
-    for tag in tags:
-        html = re.sub(
-            rf"<{tag}\b[^>]*>[\s\S]*?</{tag}>",
-            "",
-            html,
-            flags=re.IGNORECASE,
-        )
-        # Self-closing
-        html = re.sub(rf"<{tag}\b[^>]*/?>", "", html, flags=re.IGNORECASE)
-    return html
+def _extract_metadata_dom(tree) -> dict:
+    found = {}
+    node = tree.css_first("title")
+    if node is not None:
+        found["title"] = _TAG_STRIP_RE.sub("", node.text())
+
+    for node in tree.css("meta[content]"):
+        attrs = list(node.attributes.items())
+        content_index = next(i for i, (name, _) in enumerate(attrs) if name == "content")
+        value = attrs[content_index][1]
+        if not value:
+            continue
+        # One key per tag, preferring one that precedes content
+        candidates = [
+            (0 if i < content_index else 1, name, key.lower())
+            for i, (name, key) in enumerate(attrs)
+            if name in ("property", "name") and key and key.lower() in _META_KEYS
+        ]
+        if not candidates:
+            continue
+        order, attr, key = min(candidates, key=lambda candidate: candidate[0])
+        if _add_meta(found, attr, key, order, value):
+            break
+
+    # Lexbor already decoded entities in text and attribute values
+    return _resolve_metadata(found)
+
+
+def extract_metadata(html: str, tree=None) -> dict:
+    """Extract title and description from HTML (or its parse_html tree)."""
+    if tree is None:
+        tree = parse_html(html)
+    if tree is not None:
+        return _extract_metadata_dom(tree)
+
+    # First value per "title" for the <title> tag, and per (meta key, order)
+    found = {}
+    for m in _METADATA_RE.finditer(html):
+        title_text, attr, key, content, content_first, attr_last, key_last = m.groups()
+        if title_text is not None:
+            found.setdefault("title", _TAG_STRIP_RE.sub("", title_text))
+            continue
+        if key is not None:
+            attr, key, order, value = attr.lower(), key.lower(), 0, content
+        else:
+            attr, key, order, value = attr_last.lower(), key_last.lower(), 1, content_first
+        if _add_meta(found, attr, key, order, value):
+            break
+
+    return _resolve_metadata(found, unescape)
+
+
+def strip_tags_and_content(html: str) -> str:
+    """Remove non-content tags and their content entirely."""
+    html = _STRIP_BLOCK_RE.sub("", html)
+    # Self-closing and unclosed leftovers
+    return _STRIP_SELF_RE.sub("", html)
+
+
+def _is_hidden_attr(name: str, value: str) -> bool:
+    """Check one lower-cased attribute for hidden, aria-hidden="true" or display:none."""
+    if name == "hidden":
+        return True
+    if name == "aria-hidden":
+        return value == "true"
+    if name == "style":
+        return _DISPLAY_NONE_RE.search(value) is not None
+    return False
+
+
+def _is_hidden(attrs: str) -> bool:
+    """Check an opening tag's attribute string for hidden attributes."""
+    for m in _ATTR_RE.finditer(attrs.lower()):
+        if _is_hidden_attr(m.group(1), m.group(2) or m.group(3) or m.group(4) or ""):
+            return True
+    return False
+
+
+def _close_tag_ends(html: str, tag: str) -> dict[int, int]:
+    """Map the end of each <tag> opening tag to the end of its matching close tag.
+
+    One forward pass with a stack; opening tags that are never closed get
+    no entry.
+    """
+    pattern = _TAG_BOUNDARY_RES.get(tag)
+    if pattern is None:
+        pattern = re.compile(rf"<(/?){re.escape(tag)}(?![\w:-])[^<>]*>", re.IGNORECASE)
+        _TAG_BOUNDARY_RES[tag] = pattern
+
+    ends = {}
+    open_ends = []
+    for m in pattern.finditer(html):
+        if m.group(1):
+            if open_ends:
+                ends[open_ends.pop()] = m.end()
+        elif not m.group(0).endswith("/>"):
+            open_ends.append(m.end())
+    return ends
 
 
 def strip_hidden_elements(html: str) -> str:
     """Remove elements with hidden styles or attributes."""
-    # Remove aria-hidden="true"
-    html = re.sub(r'<[^>]+aria-hidden\s*=\s*["\']true["\'][^>]*>[\s\S]*?</[^>]+>', "", html, flags=re.IGNORECASE)
-    # Remove display:none
-    html = re.sub(r'<[^>]+style\s*=\s*["\'][^"\']*display\s*:\s*none[^"\']*["\'][^>]*>[\s\S]*?</[^>]+>', "", html, flags=re.IGNORECASE)
-    # Remove hidden attribute
-    html = re.sub(r"<[^>]+\bhidden\b[^>]*>[\s\S]*?</[^>]+>", "", html, flags=re.IGNORECASE)
-    return html
+    parts = []
+    pos = 0
+    kept_from = 0
+    close_ends: dict[str, dict[int, int]] = {}
+    while True:
+        m = _HIDDEN_CANDIDATE_RE.search(html, pos)
+        if not m:
+            break
+        pos = m.end()
+        if not _is_hidden(m.group(2)):
+            continue
+        parts.append(html[kept_from:m.start()])
+        tag = m.group(1).lower()
+        if tag not in VOID_TAGS and not m.group(0).endswith("/>"):
+            ends = close_ends.get(tag)
+            if ends is None:
+                ends = close_ends[tag] = _close_tag_ends(html, tag)
+            # Unclosed elements only lose their opening tag
+            pos = ends.get(pos, pos)
+        kept_from = pos
+    parts.append(html[kept_from:])
+    return "".join(parts)
+
+
+def _extract_segments_dom(tree) -> list[str]:
+    strip = [
+        node for node in tree.css(_DOM_STRIP_SELECTOR)
+        if node.tag in NON_CONTENT_TAGS or any(
+            _is_hidden_attr(name, (value or "").lower())
+            for name, value in node.attributes.items()
+        )
+    ]
+    # Reverse document order so nested matches are removed before their ancestors
+    for node in reversed(strip):
+        node.decompose()
+
+    segments = []
+    for node in tree.css(_DOM_CONTENT_SELECTOR):
+        # Nested content tags are covered by their outermost content ancestor
+        parent = node.parent
+        while parent is not None and parent.tag not in CONTENT_TAGS:
+            parent = parent.parent
+        if parent is not None:
+            continue
+        text = " ".join(node.text().split())
+        min_len, prefix = _SEGMENT_FORMATS.get(node.tag, _DEFAULT_SEGMENT_FORMAT)
+        if len(text) >= min_len:
+            segments.append(prefix + text)
+
+    return segments
+
+
+def _has_content_tags(html: str) -> bool:
+    if any(marker in html for marker in _CONTENT_MARKERS):
+        return True
+    lowered = html.lower()
+    return any(marker in lowered for marker in _CONTENT_MARKERS)
+
+
+def extract_segments(html: str, tree=None) -> list[str]:
+    """Extract text segments from content tags.
 
+    A tree from parse_html is used instead of reparsing; non-content and
+    hidden nodes are removed from it in place.
+    """
+    if not _has_content_tags(html):
+        return []
+    if tree is None:
+        tree = parse_html(html)
+    if tree is not None:
+        return _extract_segments_dom(tree)
 
-def extract_segments(html: str) -> list[str]:
-    """Extract text segments from content tags."""
     segments = []
 
     # Remove non-content tags
-    html = strip_tags_and_content(html, [
-        "script", "style", "noscript", "template", "svg", "canvas",
-        "iframe", "object", "embed", "nav", "footer",
-    ])
+    html = strip_tags_and_content(html)
     html = strip_hidden_elements(html)
     # Remove HTML comments
-    html = re.sub(r"<!--[\s\S]*?-->", "", html)
+    html = _COMMENT_RE.sub("", html)
 
     # Extract from content tags
-    content_pattern = re.compile(
-        r"<(p|h[1-6]|li|blockquote|pre|td|figcaption)\b[^>]*>([\s\S]*?)</\1>",
-        re.IGNORECASE,
-    )
-
-    for m in content_pattern.finditer(html):
-        tag = m.group(1).lower()
-        inner = m.group(2)
+    for m in _CONTENT_RE.finditer(html):
+        tag, text = m.groups()
 
         # Strip all HTML tags from inner content
-        text = re.sub(r"<[^>]+>", "", inner)
+        if "<" in text:
+            text = _TAG_STRIP_RE.sub("", text)
         text = unescape(text)
         # Normalize whitespace
-        text = re.sub(r"\s+", " ", text).strip()
+        text = " ".join(text.split())
 
-        if not text:
-            continue
-
-        if tag.startswith("h") and len(tag) == 2:
-            if len(text) >= 10:
-                level = tag[1]
-                segments.append(f"{'#' * int(level)} {text}")
-        elif tag == "li":
-            if len(text) >= 20:
-                segments.append(f"• {text}")
-        elif len(text) >= 30:
-            segments.append(text)
+        min_len, prefix = _SEGMENT_FORMATS.get(tag.lower(), _DEFAULT_SEGMENT_FORMAT)
+        if len(text) >= min_len:
+            segments.append(prefix + text)
 
     return segments
 
 
 def normalize_text(text: str) -> str:
     """Normalize whitespace and invisible chars."""
-    text = re.sub(r"[\u200b-\u200f\u202a-\u202e\u2060-\u2069\ufeff]", "", text)
+    text = _INVISIBLE_RE.sub("", text)
     text = text.replace("\u00a0", " ")
-    text = re.sub(r"[\t ]+", " ", text)
-    text = re.sub(r"\s*\n\s*", "\n", text)
-    text = re.sub(r"\n{3,}", "\n\n", text)
+    text = _HSPACE_RE.sub(" ", text)
+    # Also collapses blank lines: \s* swallows any neighbouring newlines
+    text = _NEWLINE_RE.sub("\n", text)
     return text.strip()
 
 
@@ -159,8 +378,13 @@ def clip_at_sentence(text: str, max_chars: int) -> str:
     if len(text) <= max_chars:
         return text
     clip = text[:max_chars]
-    last_break = max(clip.rfind(". "), clip.rfind("! "), clip.rfind("? "), clip.rfind("\n\n"))
-    if last_break > max_chars * 0.5:
+    # Only breaks in the back half count, so don't search the front half
+    min_break = int(max_chars * 0.5) + 1
+    last_break = max(
+        clip.rfind(". ", min_break), clip.rfind("! ", min_break),
+        clip.rfind("? ", min_break), clip.rfind("\n\n", min_break),
+    )
+    if last_break >= min_break:
         return clip[:last_break + 1]
     return clip
 
@@ -182,8 +406,10 @@ def main():
         print(f"Error fetching {args.url}: {e}", file=sys.stderr)
         sys.exit(1)
 
-    metadata = extract_metadata(html)
-    segments = extract_segments(html)
+    # Metadata first: extract_segments strips nodes from the shared tree
+    tree = parse_html(html)
+    metadata = extract_metadata(html, tree)
+    segments = extract_segments(html, tree)
     content = normalize_text("\n".join(segments))
 
     if args.max_chars > 0:
@@ -8,19 +8,28 @@ Uses the same approach as steipete/summarize:
 4. Fall back to caption track URLs (json3 format, then XML)
 5. Try ANDROID client player API as last resort
 
+Step 4 starts as soon as step 3 fails or runs past a short head start;
+its top caption tracks are then fetched concurrently. Results are still
+taken in order.
+
 Usage: python3 extract_youtube_transcript.py <youtube_url> [--timestamps] [--json]
 
 Output: Transcript text to stdout.
 """
 
 import argparse
+import http.client
 import json
 import re
+import ssl
 import sys
+import threading
+from collections.abc import Callable
+from concurrent.futures import Future
 import urllib.request
 import urllib.error
 from html import unescape
-from urllib.parse import urlparse, parse_qs, urlencode
+from urllib.parse import urlparse, parse_qs, urlencode, urljoin, urlsplit
 
 REQUEST_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36",
@@ -28,9 +37,59 @@ REQUEST_HEADERS = {
     "Cache-Control": "no-cache",
 }
 
+# Shared by all requests: building a context parses the whole CA bundle
+_SSL_CTX = ssl.create_default_context()
+try:
+    import certifi
+    _SSL_CTX.load_verify_locations(certifi.where())
+except ImportError:
+    pass
+
+MAX_REDIRECTS = 5
+READ_CHUNK_SIZE = 64 * 1024
+# Seconds the youtubei request runs alone before caption tracks start
+YOUTUBEI_HEAD_START = 1.5
+# Caption tracks downloaded concurrently once youtubei fails or is slow
+PARALLEL_CAPTION_TRACKS = 3
+_REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+
+# Idle keep-alive connections per (scheme, netloc), shared by all fetches
+_IDLE_CONNECTIONS: dict[tuple[str, str], list[http.client.HTTPConnection]] = {}
+_IDLE_LOCK = threading.Lock()
+
+_JSON_DECODER = json.JSONDecoder()
+# Common URL shapes: youtu.be/ID, /watch?...v=ID, /shorts|live|embed|v/ID
+_VIDEO_ID_RE = re.compile(
+    r"https?://(?:youtu\.be/|(?:[A-Za-z0-9-]+\.)*youtube\.com/"
+    r"(?:watch\?(?:[^&#]*&)*?v=|(?:shorts|live|embed|v)/))"
+    r"([A-Za-z0-9_-]{11})(?![A-Za-z0-9_-])"
+)
+_XSSI_RE = re.compile(r"^\)\]\}'[^\n]*\n?")
+_INNERTUBE_API_KEY_RES = (
+    re.compile(r'"INNERTUBE_API_KEY":"([^"]+)"'),
+    re.compile(r'INNERTUBE_API_KEY\\":\\"([^\\"]+)\\"'),
+)
+_YTCFG_SET_RE = re.compile(r"ytcfg\.set\s*\(\s*\{")
+_PLAYER_RESPONSE_RE = re.compile(r"ytInitialPlayerResponse\s*=\s*\{")
+_TRANSCRIPT_PARAMS_RE = re.compile(r'"getTranscriptEndpoint":\{"params":"([^"]+)"\}')
+# <text start=".." dur="..">body</text>; optional lookaheads capture the
+# attributes in any order during the same match
+_XML_TEXT_RE = re.compile(
+    r"<text\b"
+    r"""(?:(?=[^>]*\bstart\s*=\s*["']([^"']+)["']))?"""
+    r"""(?:(?=[^>]*\bdur\s*=\s*["']([^"']+)["']))?"""
+    r"[^>]*>([\s\S]*?)</text>",
+    re.IGNORECASE,
+)
+_FMT_PARAM_RE = re.compile(r"&fmt=[^&]+")
+
 
 def extract_video_id(url: str) -> str | None:
     """Extract YouTube video ID from various URL formats."""
+    m = _VIDEO_ID_RE.match(url)
+    if m:
+        return m.group(1)
+
     parsed = urlparse(url)
     host = parsed.hostname or ""
 
@@ -52,25 +111,103 @@ def extract_video_id(url: str) -> str | None:
     return None
 
 
-def _ssl_context():
-    import ssl
-    ctx = ssl.create_default_context()
-    try:
-        import certifi
-        ctx.load_verify_locations(certifi.where())
-    except ImportError:
-        pass
-    return ctx
+def _acquire_connection(scheme: str, netloc: str, timeout: int) -> tuple[http.client.HTTPConnection, bool]:
+    """Return (connection, reused), preferring an idle keep-alive connection."""
+    with _IDLE_LOCK:
+        idle = _IDLE_CONNECTIONS.get((scheme, netloc))
+        conn = idle.pop() if idle else None
+    if conn is not None:
+        conn.timeout = timeout
+        if conn.sock is not None:
+            conn.sock.settimeout(timeout)
+        return conn, True
+    if scheme == "https":
+        return http.client.HTTPSConnection(netloc, timeout=timeout, context=_SSL_CTX), False
+    return http.client.HTTPConnection(netloc, timeout=timeout), False
+
+
+def _release_connection(scheme: str, netloc: str, conn: http.client.HTTPConnection) -> None:
+    with _IDLE_LOCK:
+        _IDLE_CONNECTIONS.setdefault((scheme, netloc), []).append(conn)
+
+
+def _request(method: str, url: str, headers: dict, data: bytes | None, timeout: int) -> tuple[http.client.HTTPResponse, bytes]:
+    """Send one request over a pooled connection and return (response, body)."""
+    parts = urlsplit(url)
+    target = parts.path or "/"
+    if parts.query:
+        target += "?" + parts.query
+
+    while True:
+        conn, reused = _acquire_connection(parts.scheme, parts.netloc, timeout)
+        try:
+            conn.request(method, target, body=data, headers=headers)
+            resp = conn.getresponse()
+            body = _read_body(resp)
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            # The server may have dropped an idle keep-alive connection
+            if reused and isinstance(e, ConnectionError):
+                continue
+            raise
+        break
+
+    if resp.will_close:
+        conn.close()
+    else:
+        _release_connection(parts.scheme, parts.netloc, conn)
+    return resp, body
+
+
+def _read_body(resp) -> bytes | bytearray:
+    """Read a response body without buffering chunked bodies twice."""
+    if not isinstance(resp, http.client.HTTPResponse) or resp.length is not None:
+        # file:/data: URLs give plain file objects; with a Content-Length,
+        # read() fills one exactly-sized buffer
+        return resp.read()
+    # Chunked: append into one growing buffer instead of joining a chunk list
+    buf = bytearray()
+    while chunk := resp.read1(READ_CHUNK_SIZE):
+        buf += chunk
+    return buf
+
+
+def _uses_proxy(url: str) -> bool:
+    parts = urlsplit(url)
+    return parts.scheme in urllib.request.getproxies() and not urllib.request.proxy_bypass(parts.hostname or "")
+
 
 def fetch_url(url: str, headers: dict = None, data: bytes = None, timeout: int = 10) -> str:
-    """Fetch URL and return text content."""
+    """Fetch URL and return text content.
+
+    Connections are kept alive and reused per host, so the watch page,
+    youtubei and caption requests share TCP/TLS handshakes.
+    """
     hdrs = dict(REQUEST_HEADERS)
     if headers:
         hdrs.update(headers)
-    req = urllib.request.Request(url, headers=hdrs, data=data)
-    with urllib.request.urlopen(req, timeout=timeout, context=_ssl_context()) as resp:
+
+    if _uses_proxy(url):
+        req = urllib.request.Request(url, headers=hdrs, data=data)
+        with urllib.request.urlopen(req, timeout=timeout, context=_SSL_CTX) as resp:
+            charset = resp.headers.get_content_charset() or "utf-8"
+            return _read_body(resp).decode(charset, errors="replace")
+
+    method = "POST" if data is not None else "GET"
+    for _ in range(MAX_REDIRECTS + 1):
+        resp, body = _request(method, url, hdrs, data, timeout)
+        location = resp.getheader("Location")
+        if resp.status in _REDIRECT_STATUSES and location:
+            url = urljoin(url, location)
+            if resp.status == 303 or (resp.status in (301, 302) and method == "POST"):
+                method, data = "GET", None
+                hdrs.pop("Content-Type", None)
+            continue
+        if resp.status >= 400:
+            raise urllib.error.HTTPError(url, resp.status, resp.reason, resp.headers, None)
         charset = resp.headers.get_content_charset() or "utf-8"
-        return resp.read().decode(charset, errors="replace")
+        return body.decode(charset, errors="replace")
+    raise urllib.error.URLError(f"Too many redirects: {url}")
 
 
 def fetch_json(url: str, payload: dict = None, extra_headers: dict = None, timeout: int = 10) -> dict | None:
@@ -82,72 +219,36 @@ def fetch_json(url: str, payload: dict = None, extra_headers: dict = None, timeo
     try:
         text = fetch_url(url, headers=headers, data=data, timeout=timeout)
         # Strip potential XSSI guard
-        text = re.sub(r"^\)\]\}'[^\n]*\n?", "", text)
+        text = _XSSI_RE.sub("", text)
         return json.loads(text)
     except Exception:
         return None
 
 
-def extract_balanced_json(source: str, start_at: int) -> str | None:
-    """Extract a balanced JSON object from source starting near start_at."""
+def decode_json_object(source: str, start_at: int) -> dict | None:
+    """Decode the JSON object starting at the first '{' at or after start_at."""
     start = source.find("{", start_at)
     if start < 0:
         return None
-
-    depth = 0
-    in_string = False
-    escaping = False
-
-    for i in range(start, len(source)):
-        ch = source[i]
-        if in_string:
-            if escaping:
-                escaping = False
-                continue
-            if ch == "\\":
-                escaping = True
-                continue
-            if ch in ('"', "'"):
-                in_string = False
-            continue
-        if ch in ('"', "'"):
-            in_string = True
-            continue
-        if ch == "{":
-            depth += 1
-        elif ch == "}":
-            depth -= 1
-            if depth == 0:
-                return source[start : i + 1]
-    return None
+    try:
+        obj, _ = _JSON_DECODER.raw_decode(source, start)
+    except json.JSONDecodeError:
+        return None
+    return obj
 
 
 def extract_initial_player_response(html: str) -> dict | None:
     """Extract ytInitialPlayerResponse from watch page HTML."""
-    token = "ytInitialPlayerResponse"
-    idx = html.find(token)
-    if idx < 0:
-        return None
-    eq_idx = html.find("=", idx)
-    if eq_idx < 0:
-        return None
-    obj_text = extract_balanced_json(html, eq_idx)
-    if not obj_text:
-        return None
-    try:
-        return json.loads(obj_text)
-    except json.JSONDecodeError:
+    m = _PLAYER_RESPONSE_RE.search(html)
+    if not m:
         return None
+    return decode_json_object(html, m.end() - 1)
 
 
 def extract_innertube_api_key(html: str) -> str | None:
     """Extract INNERTUBE_API_KEY from page HTML."""
-    patterns = [
-        r'"INNERTUBE_API_KEY":"([^"]+)"',
-        r'INNERTUBE_API_KEY\\":\\"([^\\"]+)\\"',
-    ]
-    for pat in patterns:
-        m = re.search(pat, html)
+    for pattern in _INNERTUBE_API_KEY_RES:
+        m = pattern.search(html)
         if m:
             return m.group(1).strip()
     return None
@@ -155,26 +256,15 @@ def extract_innertube_api_key(html: str) -> str | None:
 
 def extract_bootstrap_config(html: str) -> dict | None:
     """Extract ytcfg bootstrap config."""
-    m = re.search(r"ytcfg\.set\s*\(\s*\{", html)
+    m = _YTCFG_SET_RE.search(html)
     if not m:
         return None
-    obj = extract_balanced_json(html, m.start())
-    if not obj:
-        # Try to find the { after the match
-        brace_start = html.find("{", m.start())
-        if brace_start >= 0:
-            obj = extract_balanced_json(html, brace_start)
-    if not obj:
-        return None
-    try:
-        return json.loads(obj)
-    except json.JSONDecodeError:
-        return None
+    return decode_json_object(html, m.end() - 1)
 
 
 def extract_transcript_params(html: str) -> str | None:
     """Extract getTranscriptEndpoint params."""
-    m = re.search(r'"getTranscriptEndpoint":\{"params":"([^"]+)"\}', html)
+    m = _TRANSCRIPT_PARAMS_RE.search(html)
     return m.group(1) if m else None
 
 
@@ -184,15 +274,11 @@ def get_caption_tracks(player_response: dict) -> list[dict]:
     renderer = captions.get("playerCaptionsTracklistRenderer", {})
     tracks = renderer.get("captionTracks", [])
 
-    # Sort: prefer manual over ASR, prefer English
-    def sort_key(track):
-        kind = track.get("kind", "")
-        lang = track.get("languageCode", "")
-        is_asr = 1 if kind == "asr" else 0
-        is_en = 0 if lang.startswith("en") else 1
-        return (is_asr, is_en)
-
-    return sorted(tracks, key=sort_key)
+    # Sort: prefer manual over ASR, prefer English (False sorts first)
+    return sorted(tracks, key=lambda t: (
+        t.get("kind") == "asr",
+        not t.get("languageCode", "").startswith("en"),
+    ))
 
 
 def parse_json3_transcript(text: str) -> list[dict] | None:
@@ -222,7 +308,7 @@ def parse_json3_transcript(text: str) -> list[dict] | None:
 
         start_ms = event.get("tStartMs")
         duration_ms = event.get("dDurationMs")
-        segment = {"text": re.sub(r"\s+", " ", text).strip()}
+        segment = {"text": " ".join(text.split())}
         if start_ms is not None:
             segment["start_ms"] = int(start_ms)
             if duration_ms is not None:
@@ -234,31 +320,24 @@ def parse_json3_transcript(text: str) -> list[dict] | None:
 
 def parse_xml_transcript(xml: str) -> list[dict] | None:
     """Parse XML caption format."""
-    pattern = re.compile(r"<text[^>]*>([\s\S]*?)</text>", re.IGNORECASE)
-    start_pattern = re.compile(r'\bstart\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
-    dur_pattern = re.compile(r'\bdur\s*=\s*["\']([^"\']+)["\']', re.IGNORECASE)
-
     segments = []
-    for match in pattern.finditer(xml):
-        text = unescape(match.group(1)).strip()
-        text = re.sub(r"\s+", " ", text)
+    for match in _XML_TEXT_RE.finditer(xml):
+        start, dur, body = match.groups()
+        text = " ".join(unescape(body).split())
         if not text:
             continue
 
-        tag = match.group(0)
         segment = {"text": text}
 
-        start_m = start_pattern.search(tag)
-        if start_m:
+        if start is not None:
             try:
-                segment["start_ms"] = int(float(start_m.group(1)) * 1000)
+                segment["start_ms"] = int(float(start) * 1000)
             except ValueError:
                 pass
 
-        dur_m = dur_pattern.search(tag)
-        if dur_m and "start_ms" in segment:
+        if dur is not None and "start_ms" in segment:
             try:
-                segment["end_ms"] = segment["start_ms"] + int(float(dur_m.group(1)) * 1000)
+                segment["end_ms"] = segment["start_ms"] + int(float(dur) * 1000)
             except ValueError:
                 pass
 
@@ -285,11 +364,11 @@ def download_caption_track(base_url: str) -> list[dict] | None:
 
     # Fall back to XML
     try:
-        xml_url = re.sub(r"&fmt=[^&]+", "", base_url)
+        xml_url = _FMT_PARAM_RE.sub("", base_url)
         text = fetch_url(xml_url)
-        result = parse_json3_transcript(text)
-        if result:
-            return result
+        # Sniff instead of trial-parsing: a leading ?fmt= survives the strip above
+        if text[:100].lstrip().startswith("{"):
+            return parse_json3_transcript(text)
         return parse_xml_transcript(text)
     except Exception:
         return None
@@ -366,7 +445,7 @@ def parse_youtubei_response(data: dict) -> list[dict] | None:
             if not text:
                 continue
 
-            segment = {"text": re.sub(r"\s+", " ", text).strip()}
+            segment = {"text": " ".join(text.split())}
             start_ms = seg_renderer.get("startMs")
             duration_ms = seg_renderer.get("durationMs")
             if start_ms is not None:
@@ -418,12 +497,67 @@ def try_android_player(html: str, video_id: str) -> list[dict] | None:
     return None
 
 
+def extract_video_title(html: str) -> str | None:
+    """Extract the first "title" string value from page HTML."""
+    idx = html.find('"title":"')
+    if idx < 0:
+        return None
+    try:
+        title, _ = _JSON_DECODER.raw_decode(html, idx + len('"title":'))
+    except json.JSONDecodeError:
+        return None
+    return title
+
+
+def _start_daemon(fn: Callable[[], list[dict] | None]) -> Future:
+    """Run fn on a daemon thread, so an abandoned fetch never delays exit."""
+    future = Future()
+
+    def run():
+        try:
+            future.set_result(fn())
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=run, daemon=True).start()
+    return future
+
+
+def first_successful(
+    attempts: list[tuple[str, Callable[[], list[dict] | None]]],
+    head_start: float,
+) -> tuple[list[dict] | None, str | None]:
+    """Return the first successful (segments, source) in list order.
+
+    The first attempt runs alone for up to head_start seconds; the others
+    only start if it fails or is still running by then.
+    """
+    source, fn = attempts[0]
+    first = _start_daemon(fn)
+    try:
+        segments = first.result(timeout=head_start)
+    except Exception:
+        # Failed, or still running and now raced by the other attempts
+        segments = None
+    if segments:
+        return segments, source
+
+    futures = [(source, first)]
+    futures += [(source, _start_daemon(fn)) for source, fn in attempts[1:]]
+    for source, future in futures:
+        try:
+            segments = future.result()
+        except Exception:
+            continue
+        if segments:
+            return segments, source
+    return None, None
+
+
 def format_timestamp(ms: int) -> str:
     """Format milliseconds as mm:ss or hh:mm:ss."""
-    total_seconds = ms // 1000
-    hours = total_seconds // 3600
-    minutes = (total_seconds % 3600) // 60
-    seconds = total_seconds % 60
+    minutes, seconds = divmod(ms // 1000, 60)
+    hours, minutes = divmod(minutes, 60)
     if hours > 0:
         return f"{hours}:{minutes:02d}:{seconds:02d}"
     return f"{minutes}:{seconds:02d}"
@@ -451,35 +585,31 @@ def main():
         print(f"Error fetching watch page: {e}", file=sys.stderr)
         sys.exit(1)
 
-    # Extract video title
-    title = None
-    m = re.search(r'"title":"((?:[^"\\]|\\.)*)"', html)
-    if m:
-        title = m.group(1).encode().decode("unicode_escape", errors="replace")
+    title = extract_video_title(html)
 
-    # Step 2: Try youtubei get_transcript endpoint (preferred)
-    segments = None
-    source = None
+    # Step 2: Caption tracks from ytInitialPlayerResponse
+    player_response = extract_initial_player_response(html)
+    tracks = get_caption_tracks(player_response) if player_response else []
+    track_urls = [url for url in (t.get("baseUrl") or t.get("url") for t in tracks) if url]
 
-    segments = try_youtubei_transcript(html, watch_url)
-    if segments:
-        source = "youtubei"
+    # Step 3+4: youtubei get_transcript endpoint (preferred), then the top
+    # caption tracks concurrently if youtubei fails or is slow
+    attempts = [("youtubei", lambda: try_youtubei_transcript(html, watch_url))]
+    attempts += [
+        ("captionTracks", lambda url=url: download_caption_track(url))
+        for url in track_urls[:PARALLEL_CAPTION_TRACKS]
+    ]
+    segments, source = first_successful(attempts, YOUTUBEI_HEAD_START)
 
-    # Step 3: Try caption tracks from ytInitialPlayerResponse
+    # Remaining caption tracks
     if not segments:
-        player_response = extract_initial_player_response(html)
-        if player_response:
-            tracks = get_caption_tracks(player_response)
-            for track in tracks:
-                base_url = track.get("baseUrl") or track.get("url")
-                if not base_url:
-                    continue
-                segments = download_caption_track(base_url)
-                if segments:
-                    source = "captionTracks"
-                    break
-
-    # Step 4: Try ANDROID player API
+        for base_url in track_urls[PARALLEL_CAPTION_TRACKS:]:
+            segments = download_caption_track(base_url)
+            if segments:
+                source = "captionTracks"
+                break
+
+    # Step 5: Try ANDROID player API
     if not segments:
         segments = try_android_player(html, video_id)
         if segments:
@@ -502,9 +632,10 @@ def main():
         }
         print(json.dumps(result, ensure_ascii=False, indent=2))
     elif args.timestamps:
-        for seg in segments:
-            ts = format_timestamp(seg["start_ms"]) if "start_ms" in seg else "?"
-            print(f"[{ts}] {seg['text']}")
+        print("\n".join(
+            f"[{format_timestamp(seg['start_ms']) if 'start_ms' in seg else '?'}] {seg['text']}"
+            for seg in segments
+        ))
     else:
         print(f"# {title}\n" if title else "")
         print("\n".join(s["text"] for s in segments))